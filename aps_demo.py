@@ -4,17 +4,129 @@ APS (Agile Protocol Specification) Command Demonstration
 Shows how the APS slash commands would work in practice
 """
 
+import copy
+import itertools
 import yaml
 import json
-from datetime import datetime
 import os
+import re
+import time
+import warnings
+
+# Prefer the libyaml-backed C loader/dumper; fall back to pure Python
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+if not yaml.__with_libyaml__:
+    warnings.warn("PyYAML built without libyaml; install pyyaml[libyaml] for faster APS file I/O")
+
+def _utc_timestamp():
+    """ISO-8601 UTC timestamp with second precision, e.g. 2024-12-15T22:00:00Z"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+# Active entries in the role assignment file: timestamp:role:session_id:active[_detail]
+_ROLE_RE = re.compile(rb"^\d+:([^:\n]+):([^:\n]+):(active[^:\n]*)", re.MULTILINE)
+
+def _parse_active_agents(data):
+    """(role, session_id, status) for each active entry in raw role file bytes"""
+    return [
+        (m.group(1).decode(), m.group(2).decode(), m.group(3).decode().rstrip())
+        for m in _ROLE_RE.finditer(data)
+    ]
+
+APS_SUFFIX = ".aps.yaml"
+
+# Directory listings younger than this are not trusted to the mtime-keyed cache
+APS_DIR_SETTLE_NS = 1_000_000_000
+
+# Per-process sidecars written by aps_handoff next to the APS file, named after its stem
+MESSAGES_SUFFIX = ".messages.jsonl"
+STATE_SUFFIX = ".state.yaml"
+
+# Lines read when only the process header (name/status) is needed
+APS_HEADER_LINES = 40
+
+# process.status line; only a header containing it can stand in for the full file
+_HEADER_STATUS_RE = re.compile(r"^  status:", re.MULTILINE)
+
+def _read_aps_header(path):
+    """Load just the leading block of an APS file, falling back to a single full parse"""
+    with open(path, 'r') as f:
+        lines = list(itertools.islice(f, APS_HEADER_LINES))
+        head = "".join(lines)
+        if len(lines) < APS_HEADER_LINES:
+            # Whole file already read
+            return yaml.load(head, Loader=Loader)
+        if _HEADER_STATUS_RE.search(head):
+            try:
+                data = yaml.load(head, Loader=Loader)
+                data['process']['name']
+                if 'status' in data['process']:
+                    return data
+            except (KeyError, TypeError, yaml.YAMLError):
+                pass
+        f.seek(0)
+        return yaml.load(f, Loader=Loader)
 
 class APSCommandDemo:
+    # Parsed aps_template.yaml shared across instances: (path, mtime_ns, data)
+    _template_cache = None
+
     def __init__(self, base_path="/Users/sac/dev/ai-self-sustaining-system"):
         self.base_path = base_path
         self.role_file = os.path.join(base_path, ".claude_role_assignment")
-        
-    def aps_init(self):
+        self._dir_mtime = None
+        self._aps_files = None
+
+    def _load_template(self):
+        """Return the parsed template, re-reading only when the file changes"""
+        path = os.path.join(self.base_path, "aps_template.yaml")
+        mtime = os.stat(path).st_mtime_ns
+        cached = APSCommandDemo._template_cache
+        if cached is None or cached[0] != path or cached[1] != mtime:
+            with open(path, 'r') as f:
+                cached = (path, mtime, yaml.load(f, Loader=Loader))
+            APSCommandDemo._template_cache = cached
+        return cached[2]
+
+    def _list_aps_files(self):
+        """Return APS file names in base_path, rescanning only when the directory changes"""
+        mtime = os.stat(self.base_path).st_mtime_ns
+        # A change within the same mtime tick is invisible to the comparison, so a
+        # directory modified in the last APS_DIR_SETTLE_NS is always rescanned
+        recent = time.time_ns() - mtime < APS_DIR_SETTLE_NS
+        if self._aps_files is None or mtime != self._dir_mtime or recent:
+            with os.scandir(self.base_path) as entries:
+                self._aps_files = [e.name for e in entries if e.name.endswith(APS_SUFFIX) and e.is_file()]
+            self._dir_mtime = mtime
+        return list(self._aps_files)
+
+    def _register_assignment(self, timestamp, role, session_id):
+        """Append an active assignment to the shared role file as one preformatted write"""
+        with open(self.role_file, 'ab') as f:
+            f.write(b"%d:%s:%s:active\n" % (timestamp, role.encode(), session_id.encode()))
+
+    def _sidecar_path(self, filename, suffix):
+        """Sidecar for an APS file, e.g. 001_X_requirements.aps.yaml -> 001_X_requirements.state.yaml"""
+        return os.path.join(self.base_path, filename[:-len(APS_SUFFIX)] + suffix)
+
+    def load_state_overlay(self, filename):
+        """Status fields recorded by aps_handoff, overriding those in the APS file"""
+        try:
+            with open(self._sidecar_path(filename, STATE_SUFFIX), 'r') as f:
+                return yaml.load(f, Loader=Loader) or {}
+        except FileNotFoundError:
+            return {}
+
+    def load_messages(self, filename):
+        """Handoff messages appended by aps_handoff, oldest first"""
+        try:
+            with open(self._sidecar_path(filename, MESSAGES_SUFFIX), 'r') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def aps_init(self, register=False):
         """Simulate /aps-init command"""
         print("🤖 Initializing APS Agent System...")
         
@@ -28,7 +140,7 @@ class APSCommandDemo:
             return
         
         # Scan for APS files
-        aps_files = [f for f in os.listdir(self.base_path) if f.endswith('.aps.yaml')]
+        aps_files = self._list_aps_files()
         print(f"✓ Found {len(aps_files)} APS files: {aps_files}")
         
         # Apply role assignment logic
@@ -41,10 +153,13 @@ class APSCommandDemo:
             reason = "Active processes found, assigning Developer role"
         
         # Register assignment
-        timestamp = int(datetime.now().timestamp())
+        timestamp = int(time.time())
         session_id = f"claude_{timestamp}"
         
         assignment = f"{timestamp}:{role}:{session_id}:active"
+        # Opt-in: persisted entries stay active (nothing marks them inactive later)
+        if register:
+            self._register_assignment(timestamp, role, session_id)
         
         print(f"🤖 **{role.upper()}** activated. Session ID: {timestamp}")
         print(f"Current state: {reason}")
@@ -60,20 +175,23 @@ class APSCommandDemo:
         process_id = f"001_{process_name.replace(' ', '_')}"
         filename = f"{process_id}_requirements.aps.yaml"
         
-        # Load template
-        with open(os.path.join(self.base_path, "aps_template.yaml"), 'r') as f:
-            template = yaml.safe_load(f)
+        # Load template (parsed once, copied per process)
+        template = copy.deepcopy(self._load_template())
         
         # Customize template
         template['process']['name'] = process_name
         template['process']['id'] = process_id
-        template['process']['created_at'] = datetime.now().isoformat() + 'Z'
+        template['process']['created_at'] = _utc_timestamp()
         template['process']['status'] = "requirements_gathering"
         
         # Write new process file
         output_path = os.path.join(self.base_path, filename)
         with open(output_path, 'w') as f:
-            yaml.dump(template, f, default_flow_style=False, indent=2)
+            # sort_keys=False keeps the template's key order, so process.name/status stay
+            # within the first APS_HEADER_LINES lines that aps_status reads
+            yaml.dump(template, f, Dumper=Dumper, default_flow_style=False, indent=2, sort_keys=False)
+        # Directory mtime may not tick on coarse-grained filesystems
+        self._aps_files = None
         
         print(f"✓ Created {filename}")
         print(f"✓ Process ID: {process_id}")
@@ -86,41 +204,38 @@ class APSCommandDemo:
         print(f"🔄 Handing off {process_id} to {target_role}")
         
         # Find the process file
-        aps_files = [f for f in os.listdir(self.base_path) if f.startswith(process_id) and f.endswith('.aps.yaml')]
+        aps_files = [f for f in self._list_aps_files() if f.startswith(process_id)]
         
         if not aps_files:
             print(f"❌ No APS file found for process {process_id}")
             return
         
         filename = aps_files[0]
-        filepath = os.path.join(self.base_path, filename)
-        
-        # Update the file
-        with open(filepath, 'r') as f:
-            process_data = yaml.safe_load(f)
         
-        # Add handoff message
+        # Append handoff message to the process's JSONL sidecar
+        ts = _utc_timestamp()
         new_message = {
             'from': 'Current_Agent',
             'to': target_role,
-            'timestamp': datetime.now().isoformat() + 'Z',
+            'timestamp': ts,
             'subject': f'Handoff for {process_id}',
             'content': f'Process ready for {target_role} to begin work',
             'artifacts': [{'path': filename, 'type': 'handoff', 'status': 'ready'}]
         }
+        with open(self._sidecar_path(filename, MESSAGES_SUFFIX), 'a') as f:
+            f.write(json.dumps(new_message) + "\n")
         
-        if 'messages' not in process_data['process']:
-            process_data['process']['messages'] = []
-        
-        process_data['process']['messages'].append(new_message)
-        process_data['process']['status'] = f"waiting_for_{target_role.lower()}"
-        process_data['process']['updated_at'] = datetime.now().isoformat() + 'Z'
-        
-        # Write back
-        with open(filepath, 'w') as f:
-            yaml.dump(process_data, f, default_flow_style=False, indent=2)
+        # Record status change in the state overlay; the APS file itself is left untouched.
+        # The overlay also carries the message count so aps_status never reads the JSONL.
+        state = {
+            'status': f"waiting_for_{target_role.lower()}",
+            'updated_at': ts,
+            'message_count': self.load_state_overlay(filename).get('message_count', 0) + 1,
+        }
+        with open(self._sidecar_path(filename, STATE_SUFFIX), 'w') as f:
+            yaml.dump(state, f, Dumper=Dumper, default_flow_style=False, sort_keys=False)
         
-        print(f"✓ Updated {filename}")
+        print(f"✓ Updated {os.path.basename(self._sidecar_path(filename, STATE_SUFFIX))}")
         print(f"✓ Status: waiting_for_{target_role.lower()}")
         print(f"✓ Message sent to {target_role}")
     
@@ -131,17 +246,10 @@ class APSCommandDemo:
         
         # Read role assignments
         try:
-            with open(self.role_file, 'r') as f:
-                lines = f.readlines()
-            
-            active_agents = []
-            for line in lines:
-                if ':' in line and 'active' in line:
-                    parts = line.strip().split(':')
-                    if len(parts) >= 4:
-                        timestamp, role, session, status = parts[:4]
-                        active_agents.append((role, session, status))
-        except:
+            with open(self.role_file, 'rb') as f:
+                data = f.read()
+            active_agents = _parse_active_agents(data)
+        except (OSError, UnicodeDecodeError):
             active_agents = []
         
         print(f"Active Agents: {len(active_agents)}")
@@ -149,22 +257,26 @@ class APSCommandDemo:
             print(f"  • {role} ({session}): {status}")
         
         # Scan APS files
-        aps_files = [f for f in os.listdir(self.base_path) if f.endswith('.aps.yaml')]
+        aps_files = self._list_aps_files()
         print(f"\nActive Processes: {len(aps_files)}")
         
         for filename in aps_files:
             try:
-                with open(os.path.join(self.base_path, filename), 'r') as f:
-                    data = yaml.safe_load(f)
+                data = _read_aps_header(os.path.join(self.base_path, filename))
                 process_name = data['process']['name']
-                # Check if status exists, otherwise infer from claim
-                if 'status' in data['process']:
+                overlay = self.load_state_overlay(filename)
+                # Prefer handoff overlay, then the file's status, otherwise infer from claim
+                if 'status' in overlay:
+                    process_status = overlay['status']
+                elif 'status' in data['process']:
                     process_status = data['process']['status']
                 elif 'claim' in data and 'status' in data['claim']:
                     process_status = data['claim']['status']
                 else:
                     process_status = "unknown"
                 print(f"  • {process_name}: {process_status}")
+                if overlay.get('message_count'):
+                    print(f"    messages: {overlay['message_count']}")
             except Exception as e:
                 print(f"  • {filename}: (parse error: {str(e)})")
 
@@ -3,23 +3,79 @@ import sqlite3
 import time
 import random
 import threading
+import atexit
 import os
 
+# Pending rows are written in one transaction once either limit is reached. At the
+# loop's 1-5 s pace a batch fills in 20-100 s, so the interval caps the slow runs.
+# Committed data (and query_operations) lags by at most FLUSH_INTERVAL.
+FLUSH_BATCH_SIZE = 20
+FLUSH_INTERVAL = 60.0
+
+OP_TYPES = ("user_action", "system_event", "data_update", "metric_collection")
+
+# Reused verbatim so sqlite3's per-connection statement cache can hit
+_SQL_INS_OP = "INSERT INTO operations (operation_type, timestamp, data) VALUES (?, ?, ?)"
+_SQL_INS_METRIC = "INSERT INTO metrics (metric_name, metric_value, timestamp) VALUES (?, ?, ?)"
+_SQL_COUNT_RECENT = "SELECT COUNT(*) FROM operations WHERE timestamp > ?"
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every connection; journal_mode is database-wide, the rest per-connection
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+    "cache_size=-65536",
+)
+
 class RealDataOperations:
     def __init__(self):
         self.db_path = "/Users/sac/dev/ai-self-sustaining-system/real_operations.db"
         self.log_path = "/Users/sac/dev/ai-self-sustaining-system/real_data_operations.log"
         self.running = True
+        # Line-buffered append handle kept open for the life of the process
+        self._logf = open(self.log_path, "a", buffering=1)
+        self._pending_ops = []
+        self._pending_metrics = []
+        self._pending_lock = threading.Lock()
+        # Serializes flushes on the shared write connection
+        self._write_lock = threading.Lock()
+        self._tls = threading.local()
         self.setup_database()
+        atexit.register(self.flush)
     
     def log_operation(self, operation, details=""):
         timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
-        with open(self.log_path, "a") as f:
-            f.write(f"{timestamp} {operation} {details}\n")
+        self._logf.write(f"{timestamp} {operation} {details}\n")
     
-    def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
+    def apply_pragmas(self, conn):
         cursor = conn.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        return conn
+    
+    def _conn(self):
+        """Per-thread read connection, opened once and reused"""
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self.apply_pragmas(
+                sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+            )
+            self._tls.conn = conn
+        return conn
+    
+    def setup_database(self):
+        # Long-lived connection in autocommit mode; flush() manages transactions
+        self.conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        self.apply_pragmas(self.conn)
+        cursor = self.conn.cursor()
         
         # Create real tables
         cursor.execute('''
@@ -40,52 +96,80 @@ class RealDataOperations:
             )
         ''')
         
-        conn.commit()
-        conn.close()
         self.log_operation("SETUP", "Database initialized")
     
-    def insert_operation(self, op_type, data):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT INTO operations (operation_type, timestamp, data) VALUES (?, ?, ?)",
-            (op_type, time.time(), data)
-        )
-        
-        conn.commit()
-        conn.close()
+    def insert_operation(self, op_type, data, ts=None):
+        if ts is None:
+            ts = time.time()
+        with self._pending_lock:
+            self._pending_ops.append((op_type, ts, data))
         self.log_operation("INSERT", f"{op_type}: {data}")
     
+    def record_metric(self, name, value, ts=None):
+        if ts is None:
+            ts = time.time()
+        with self._pending_lock:
+            self._pending_metrics.append((name, value, ts))
+    
+    def flush(self):
+        """Write all buffered operations and metrics in a single transaction"""
+        with self._write_lock:
+            with self._pending_lock:
+                ops, self._pending_ops = self._pending_ops, []
+                metrics, self._pending_metrics = self._pending_metrics, []
+            if not ops and not metrics:
+                return
+            
+            try:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(_SQL_INS_OP, ops)
+                self.conn.executemany(_SQL_INS_METRIC, metrics)
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                # Requeue ahead of anything buffered meanwhile so the next flush retries
+                with self._pending_lock:
+                    self._pending_ops[:0] = ops
+                    self._pending_metrics[:0] = metrics
+                raise
+        self.log_operation("FLUSH", f"{len(ops)} operations, {len(metrics)} metrics")
+    
     def query_operations(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Count committed operations from the last hour; buffered rows are not included"""
+        cursor = self._conn().cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM operations WHERE timestamp > ?", (time.time() - 3600,))
+        cursor.execute(_SQL_COUNT_RECENT, (time.time() - 3600,))
         count = cursor.fetchone()[0]
         
-        conn.close()
         self.log_operation("QUERY", f"Recent operations: {count}")
         return count
     
     def continuous_operations(self):
+        last_flush = time.time()
+        op_types, rates = [], []
         while self.running:
+            # Draw a batch's worth of random op types and rates at a time
+            if not op_types:
+                op_types = random.choices(OP_TYPES, k=FLUSH_BATCH_SIZE)
+                rates = [random.uniform(0.5, 2.0) for _ in range(FLUSH_BATCH_SIZE)]
+            
+            # One clock read per iteration, shared by the op, metric and flush check
+            now = time.time()
+            
             # Insert random data
-            op_types = ['user_action', 'system_event', 'data_update', 'metric_collection']
-            op_type = random.choice(op_types)
-            data = f"operation_{int(time.time())}_{random.randint(1000, 9999)}"
+            op_type = op_types.pop()
+            data = f"operation_{int(now)}_{random.randint(1000, 9999)}"
             
-            self.insert_operation(op_type, data)
+            self.insert_operation(op_type, data, now)
             
             # Record metric
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO metrics (metric_name, metric_value, timestamp) VALUES (?, ?, ?)",
-                ("operation_rate", random.uniform(0.5, 2.0), time.time())
-            )
-            conn.commit()
-            conn.close()
+            self.record_metric("operation_rate", rates.pop(), now)
+            
+            # Flush buffered rows in one transaction
+            if len(self._pending_ops) >= FLUSH_BATCH_SIZE or now - last_flush >= FLUSH_INTERVAL:
+                self.flush()
+                last_flush = now
             
             # Query some data
             if random.random() < 0.3:  # 30% chance to query
@@ -1,68 +1,123 @@
 #!/usr/bin/env python3
 import http.server
-import socketserver
-import json
 import time
 import os
+import threading
 from urllib.parse import parse_qs, urlparse
 
 class RealOperationsHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        self.ops_log = "/Users/sac/dev/ai-self-sustaining-system/real_web_operations.log"
-        super().__init__(*args, **kwargs)
+    ops_log = "/Users/sac/dev/ai-self-sustaining-system/real_web_operations.log"
+    work_log = "/Users/sac/dev/ai-self-sustaining-system/work_output.log"
+    
+    # work_log is rotated to work_log + ".1" once it grows past this size
+    WORK_LOG_MAX_BYTES = 10 * 1024 * 1024
+    
+    # Shared line-buffered log handle, opened once at server startup
+    _ops_logf = None
+    _log_lock = threading.Lock()
+    
+    # Shared O_APPEND descriptor for /work output
+    _work_fd = None
+    _work_lock = threading.Lock()
+    
+    _ROOT_BODY = b"<h1>Real Operations Server</h1><p>Actually serving requests!</p>"
+    _ROOT_LENGTH = str(len(_ROOT_BODY))
+    
+    # /health body is fixed apart from the timestamp and counter
+    _HEALTH_PREFIX = b'{"status": "healthy", "timestamp": '
+    _HEALTH_MID = b', "operations_logged": '
+    
+    # Lines in ops_log, counted once at startup then kept up to date by log_operation
+    _op_count = 0
+    
+    @classmethod
+    def open_log(cls):
+        with cls._log_lock:
+            if cls._ops_logf is None:
+                try:
+                    with open(cls.ops_log, "rb") as f:
+                        cls._op_count = sum(1 for _ in f)
+                except FileNotFoundError:
+                    cls._op_count = 0
+                cls._ops_logf = open(cls.ops_log, "a", buffering=1)
+        with cls._work_lock:
+            if cls._work_fd is None:
+                cls._work_fd = cls._open_work_log()
+    
+    @classmethod
+    def _open_work_log(cls):
+        return os.open(cls.work_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
     
     def log_operation(self, operation, details=""):
         timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
-        with open(self.ops_log, "a") as f:
-            f.write(f"{timestamp} {operation} {details}\n")
+        if self._ops_logf is None:
+            self.open_log()
+        cls = type(self)
+        with cls._log_lock:
+            cls._ops_logf.write(f"{timestamp} {operation} {details}\n")
+            cls._op_count += 1
+    
+    def _serve_root(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html')
+        self.send_header('Content-Length', self._ROOT_LENGTH)
+        self.end_headers()
+        self.wfile.write(self._ROOT_BODY)
+    
+    def _serve_health(self):
+        body = (self._HEALTH_PREFIX + b"%r" % time.time()
+                + self._HEALTH_MID + b"%d}" % self.count_operations())
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _serve_work(self):
+        # Simulate doing actual work
+        self.do_actual_work()
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain')
+        self.end_headers()
+        self.wfile.write(b"Work completed")
+    
+    # Known paths are dispatched directly, skipping SimpleHTTPRequestHandler's file lookup
+    _ROUTES = {
+        '/': _serve_root,
+        '/health': _serve_health,
+        '/work': _serve_work,
+    }
     
     def do_GET(self):
         self.log_operation("GET", self.path)
         
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b"<h1>Real Operations Server</h1><p>Actually serving requests!</p>")
-        
-        elif self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            health_data = {
-                "status": "healthy",
-                "timestamp": time.time(),
-                "operations_logged": self.count_operations()
-            }
-            self.wfile.write(json.dumps(health_data).encode())
-        
-        elif self.path == '/work':
-            # Simulate doing actual work
-            self.do_actual_work()
-            self.send_response(200)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b"Work completed")
-        
+        handler = self._ROUTES.get(self.path)
+        if handler is not None:
+            handler(self)
         else:
             super().do_GET()
     
     def do_actual_work(self):
-        # Actually create a file with timestamp
-        work_file = f"/Users/sac/dev/ai-self-sustaining-system/work_output_{int(time.time())}.txt"
-        with open(work_file, "w") as f:
-            f.write(f"Work completed at {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        self.log_operation("WORK", f"created {work_file}")
+        # Actually append a timestamped record to the shared work log
+        if self._work_fd is None:
+            self.open_log()
+        record = f"Work completed at {time.strftime('%Y-%m-%d %H:%M:%S')}\n".encode()
+        cls = type(self)
+        with cls._work_lock:
+            if os.fstat(cls._work_fd).st_size >= cls.WORK_LOG_MAX_BYTES:
+                os.close(cls._work_fd)
+                os.replace(cls.work_log, cls.work_log + ".1")
+                cls._work_fd = cls._open_work_log()
+            os.write(cls._work_fd, record)
+        self.log_operation("WORK", f"appended to {cls.work_log}")
     
     def count_operations(self):
-        try:
-            with open(self.ops_log, "r") as f:
-                return len(f.readlines())
-        except:
-            return 0
+        return self._op_count
 
 if __name__ == "__main__":
     PORT = 8080
-    with socketserver.TCPServer(("", PORT), RealOperationsHandler) as httpd:
+    RealOperationsHandler.open_log()
+    # One thread per request so slow /work disk I/O doesn't block other clients
+    with http.server.ThreadingHTTPServer(("", PORT), RealOperationsHandler) as httpd:
         print(f"Real operations server running on port {PORT}")
         httpd.serve_forever()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for aps_demo role file and APS header parsing"""
+
+import os
+
+from aps_demo import APS_HEADER_LINES, APSCommandDemo, _parse_active_agents, _read_aps_header
+
+
+def test_parse_active_agents_keeps_active_detail_statuses():
+    data = (
+        b"last_assignment: 1750189300\n"
+        b"# Active agents:\n"
+        b"1734311845:PM_Agent:claude_1734311845:active\n"
+        b"1750130415:DevOps_Agent:claude_auto_1750130415:active_autonomous_deployment\n"
+        b"1749967044:DevOps_Agent:claude_auto_1749967044:autonomous_deployment_coordination\n"
+        b"1734393420:Developer_Agent:claude_auto_1734393420:active_autonomous_continuous_improvement\n"
+        b"Sat Jun 14 23:43:51 PDT 2025: CYCLE_1_COMPLETE - System operational\n"
+    )
+    assert _parse_active_agents(data) == [
+        ("PM_Agent", "claude_1734311845", "active"),
+        ("DevOps_Agent", "claude_auto_1750130415", "active_autonomous_deployment"),
+        ("Developer_Agent", "claude_auto_1734393420", "active_autonomous_continuous_improvement"),
+    ]
+
+
+def test_parse_active_agents_skips_other_statuses():
+    data = (
+        b"# Current assignments (format: timestamp:role:session_id:status)\n"
+        b"1:PM_Agent:claude_1:active\n"
+        b"2:QA_Agent:claude_2:completed\n"
+        b"3:Developer_Agent:claude_3:inactive\r\n"
+        b"4:DevOps_Agent:claude_4:active\r\n"
+    )
+    assert _parse_active_agents(data) == [
+        ("PM_Agent", "claude_1", "active"),
+        ("DevOps_Agent", "claude_4", "active"),
+    ]
+
+
+def _filler(n):
+    return "".join(f"  field_{i}: value_{i}\n" for i in range(n))
+
+
+def test_read_aps_header_short_file_is_parsed_whole(tmp_path):
+    path = tmp_path / "short.aps.yaml"
+    path.write_text("process:\n  name: Short\nclaim:\n  status: claimed\n")
+
+    data = _read_aps_header(str(path))
+
+    assert data == {'process': {'name': 'Short'}, 'claim': {'status': 'claimed'}}
+
+
+def test_read_aps_header_stops_after_header_when_status_present(tmp_path):
+    path = tmp_path / "hit.aps.yaml"
+    path.write_text(
+        "process:\n  name: Hit\n  status: in_progress\n"
+        + _filler(APS_HEADER_LINES)
+        + "late_section:\n  value: 1\n"
+    )
+
+    data = _read_aps_header(str(path))
+
+    assert data['process']['status'] == "in_progress"
+    assert 'late_section' not in data
+
+
+def test_read_aps_header_falls_back_when_status_is_past_header(tmp_path):
+    path = tmp_path / "miss.aps.yaml"
+    path.write_text(
+        "process:\n  name: Miss\n"
+        + _filler(APS_HEADER_LINES)
+        + "  status: in_progress\n"
+    )
+
+    data = _read_aps_header(str(path))
+
+    assert data['process']['status'] == "in_progress"
+
+
+def test_read_aps_header_prefers_late_process_status_over_early_claim(tmp_path):
+    path = tmp_path / "edge.aps.yaml"
+    path.write_text(
+        "claim:\n  status: claimed\nprocess:\n  name: Edge\n"
+        + _filler(60)
+        + "  status: in_progress\n"
+    )
+
+    data = _read_aps_header(str(path))
+
+    assert data['process']['status'] == "in_progress"
+    assert data['claim']['status'] == "claimed"
+
+
+def test_list_aps_files_sees_file_added_within_same_mtime_tick(tmp_path):
+    (tmp_path / "001_A_requirements.aps.yaml").write_text("process:\n  name: A\n")
+    demo = APSCommandDemo(str(tmp_path))
+    assert demo._list_aps_files() == ["001_A_requirements.aps.yaml"]
+
+    # Another agent adds a file without the directory mtime moving (coarse timestamps)
+    mtime = os.stat(tmp_path).st_mtime_ns
+    (tmp_path / "001_B_requirements.aps.yaml").write_text("process:\n  name: B\n")
+    os.utime(tmp_path, ns=(mtime, mtime))
+
+    assert sorted(demo._list_aps_files()) == ["001_A_requirements.aps.yaml", "001_B_requirements.aps.yaml"]